@@ -0,0 +1,16 @@
+// Clientside callbacks used by the dashboard.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    debounce: {
+        // Copies the value of the year slider to the debounced store only once the slider
+        // stayed still for 250 ms, so dragging it triggers a single server callback.
+        apply: function (value) {
+            clearTimeout(window.yearPickerTimer);
+
+            window.yearPickerTimer = setTimeout(function () {
+                window.dash_clientside.set_props('YearPickerDebounced', {data: value});
+            }, 250);
+
+            return window.dash_clientside.no_update;
+        }
+    }
+});
@@ -1,6 +1,288 @@
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
-import plotly.express as px
+from plotly_resampler import FigureResampler
+from functools import lru_cache
+from types import MappingProxyType
+
+# DataFrames used by the memoized charts, indexed by dataset id. Filled by `load_data`.
+DATASETS = {}
+
+# Row positions of every year for each loaded DataFrame, indexed by `id(data)`. Filled by `load_data`.
+YEAR_INDEX = {}
+
+# Years found in each loaded DataFrame, indexed by `id(data)`. Filled by `load_data`.
+YEARS_AVAILABLE = {}
+
+# December rows of each loaded DataFrame with monthly data, indexed by `id(data)`. Filled by `load_data`.
+DECEMBER_ROWS = {}
+
+# Points shown per trace by the resampled line charts, shorter series are plotted as they are.
+RESAMPLER_SHOWN_SAMPLES = 1000
+
+MONTHS = MappingProxyType({
+    'enero': 1,
+    'febrero': 2,
+    'marzo': 3,
+    'abril': 4,
+    'mayo': 5,
+    'junio': 6,
+    'julio': 7,
+    'agosto': 8,
+    'septiembre': 9,
+    'octubre': 10,
+    'noviembre': 11,
+    'diciembre': 12,
+})
+
+# Columns plotted by each chart, mapped to their label in the legend.
+_AFFIL_DEFAULT = MappingProxyType({
+    'afiliados (total)': 'Todos',
+    'afiliados (subsidiado)': 'Subsidiado',
+    'afiliados (contributivo)': 'Contributivo'
+})
+_AFFIL_FILTERS = MappingProxyType({
+    'Subsidiado' : MappingProxyType({'afiliados (subsidiado)': 'Subsidiado'}),
+    'Contributivo' : MappingProxyType({'afiliados (contributivo)': 'Contributivo'}),
+})
+
+_PAID_DEFAULT = MappingProxyType({
+    'numero de cápitas pagadas (subsidiado)': 'Subsidiado',
+    'numero de cápitas pagadas (contributivo)': 'Contributivo'
+})
+_PAID_FILTERS = MappingProxyType({
+    'Subsidiado' : MappingProxyType({'numero de cápitas pagadas (subsidiado)': 'Subsidiado'}),
+    'Contributivo' : MappingProxyType({'numero de cápitas pagadas (contributivo)': 'Contributivo'}),
+})
+
+_GENDER_DEFAULT = MappingProxyType({
+    'total  (hombres)': 'Hombres',
+    'total  (mujeres)': 'Mujeres'
+})
+_GENDER_FILTERS = MappingProxyType({
+    'Subsidiado' : MappingProxyType({'régimen subsidiado (hombres )': 'Hombres', 'régimen subsidiado (mujeres )': 'Mujeres',}),
+    'Contributivo' : MappingProxyType({'régimen contributivo (hombres )': 'Hombres', 'régimen contributivo (mujeres )': 'Mujeres',}),
+})
+
+_CAPITATION_LABELS = MappingProxyType({
+    ' número de cápitas dispersadas(total)': 'Total',
+    ' número de cápitas dispersadas (titulares)': 'Titulares',
+    ' número de cápitas dispersadas (dependientes directos)': 'Dependientes directos',
+    ' número de cápitas dispersadas (dependientes adicionales)': 'Dependientes adicionales'
+})
+
+_PCT_LABELS = MappingProxyType({
+    'total de monto dispersado RD$ (titulares) %': 'Titulares',
+    'total de monto dispersado RD$ (dependientes directos) %': 'Dependientes directos',
+    'total de monto dispersado RD$ (dependientes adicionales) %': 'Dependientes adicionales'
+})
+
+def normalize_months(data: pd.DataFrame) -> pd.DataFrame:
+    """
+        Standardizes the month names of the data and maps them to their number.
+
+        Parameters
+        data : pd.DataFrame
+            A DataFrame containing at least the column 'meses' with the month names in Spanish.
+
+        Returns
+        pd.DataFrame
+            A copy of `data` where 'meses' is a lower case categorical column, ordered by month, and
+            'mes_n' holds the number of the month.
+
+        Raises
+        ValueError
+            If 'meses' has missing month names or names that are not in `MONTHS`.
+    """
+    # Standardizing months names.
+    names = data['meses'].str.strip().str.lower()
+    meses = names.astype(pd.CategoricalDtype(list(MONTHS), ordered=True))
+
+    # Raising an error naming the months that are not in MONTHS, instead of failing on the cast.
+    unknown = names[meses.isna()].unique().tolist()
+    if unknown:
+        raise ValueError(f'unknown months: {unknown}')
+
+    # Mapping the months to numbers.
+    return data.assign(meses=meses, mes_n=meses.map(MONTHS).astype(np.int8))
+
+def add_pct_columns(data: pd.DataFrame) -> pd.DataFrame:
+    """
+        Adds the percentage of the total disbursed amount of every customer type.
+
+        Parameters
+        data : pd.DataFrame
+            A DataFrame containing at least the columns 'total de monto dispersado RD$ (Total)' and
+            'total de monto dispersado RD$ (<customer type>)' for titulares, dependientes directos and
+            dependientes adicionales.
+
+        Returns
+        pd.DataFrame
+            A copy of `data` with the columns 'total de monto dispersado RD$ (<customer type>) %'.
+    """
+    # Calculating all the percentages with a single matrix operation.
+    columns = ['titulares', 'dependientes directos', 'dependientes adicionales']
+    amounts = data[[f'total de monto dispersado RD$ ({column})' for column in columns]].to_numpy(dtype=np.float32)
+    total = data['total de monto dispersado RD$ (Total)'].to_numpy(dtype=np.float32)
+    percentages = np.round(amounts / total[:, None] * 100.0, 2)
+
+    # Adding the three columns in one assignment.
+    return data.assign(**{
+        f'total de monto dispersado RD$ ({column}) %': percentages[:, i] for i, column in enumerate(columns)
+    })
+
+def _december_rows(data: pd.DataFrame) -> pd.DataFrame:
+    """
+        Returns the December rows of the data, using the rows precomputed in `DECEMBER_ROWS` when available.
+    """
+    december = DECEMBER_ROWS.get(id(data))
+
+    if december is None:
+        december = data.loc[data['meses'].str.strip().str.lower() == 'diciembre', :]
+
+    return december
+
+def _multiline(data: pd.DataFrame, x: str, columns: dict, title: str, legend_title: str) -> go.Figure:
+    """
+        Builds a line chart with one WebGL trace per column, without going through Plotly Express.
+
+        Parameters
+        data : pd.DataFrame
+            A DataFrame containing the column `x` and all the `columns`.
+        x : str
+            The column used as x axis.
+        columns : dict
+            The columns plotted as lines, mapped to the name of their trace in the legend.
+        title : str
+            The title of the chart.
+        legend_title : str
+            The title of the legend.
+
+        Returns
+        go.Figure
+            A line chart with markers. When `x` is numeric and has more than `RESAMPLER_SHOWN_SAMPLES`
+            points the chart is a `FigureResampler`, which keeps the full series in memory and only sends
+            the points of the visible window to the browser.
+    """
+    x_values = data[x].to_numpy()
+
+    # Plotly-Resampler only handles numeric or datetime axes, and only pays off on long series.
+    if x_values.dtype.kind not in 'iufM' or len(x_values) <= RESAMPLER_SHOWN_SAMPLES:
+        fig = go.Figure()
+        for column, label in columns.items():
+            fig.add_trace(go.Scattergl(x=x_values, y=data[column].to_numpy(), name=label, mode='lines+markers'))
+    else:
+        # Keeping the legend labels as they are when a trace is downsampled.
+        fig = FigureResampler(
+            default_n_shown_samples=RESAMPLER_SHOWN_SAMPLES,
+            resampled_trace_prefix_suffix=('', ''),
+            show_mean_aggregation_size=False,
+        )
+        for column, label in columns.items():
+            fig.add_trace(go.Scattergl(name=label, mode='lines+markers'), hf_x=x_values, hf_y=data[column].to_numpy())
+
+    fig.update_layout(title=title, legend_title=legend_title, xaxis_title=x, yaxis_title='')
+
+    return fig
+
+def _multibar(data: pd.DataFrame, category: str, columns: dict, title: str, legend_title: str,
+              barmode: str = 'relative', orientation: str = 'v') -> go.Figure:
+    """
+        Builds a bar chart with one trace per column, without going through Plotly Express.
+
+        Parameters
+        data : pd.DataFrame
+            A DataFrame containing the column `category` and all the `columns`.
+        category : str
+            The column holding the bar categories, used as x axis (or y axis for horizontal bars).
+        columns : dict
+            The columns plotted as bars, mapped to the name of their trace in the legend.
+        title : str
+            The title of the chart.
+        legend_title : str
+            The title of the legend.
+        barmode : str, optional
+            The Plotly bar mode ('relative', 'group' or 'stack'). Default is 'relative'.
+        orientation : str, optional
+            'v' for vertical bars or 'h' for horizontal bars. Default is 'v'.
+
+        Returns
+        go.Figure
+            A bar chart.
+    """
+    categories = data[category].to_numpy()
+
+    # Adding one trace per column.
+    fig = go.Figure()
+    for column, label in columns.items():
+        values = data[column].to_numpy()
+
+        if orientation == 'h':
+            fig.add_trace(go.Bar(x=values, y=categories, name=label, orientation='h'))
+        else:
+            fig.add_trace(go.Bar(x=categories, y=values, name=label))
+
+    # Naming the category axis, the value axis has no title.
+    if orientation == 'h':
+        axis_titles = {'xaxis_title': '', 'yaxis_title': category}
+    else:
+        axis_titles = {'xaxis_title': category, 'yaxis_title': ''}
+    fig.update_layout(title=title, legend_title=legend_title, barmode=barmode, **axis_titles)
+
+    return fig
+
+def _filter_years(data: pd.DataFrame, years: list) -> pd.DataFrame:
+    """
+        Filters the data by the selected years.
+
+        When the DataFrame was indexed in `YEAR_INDEX` the selected years are validated against
+        `YEARS_AVAILABLE` and the rows are gathered directly from the precomputed positions of each
+        year, otherwise the year mask is computed a single time.
+
+        Parameters
+        data : pd.DataFrame
+            A DataFrame containing at least the column 'año'.
+        years : list
+            A list of years (integers) to filter the data by. If the list is empty, the data is returned unfiltered.
+
+        Returns
+        pd.DataFrame
+            The rows of `data` whose year is found in `years`.
+
+        Raises
+        ValueError
+            If `years` is not a list.
+        ValueError
+            If none of the specified years are found in the data.
+    """
+    # Raising an error if years is not a list
+    if type(years) is not list:
+        raise ValueError('years must be a list.')
+
+    if len(years) == 0:
+        return data
+
+    year_index = YEAR_INDEX.get(id(data))
+
+    # Gathering the rows of the selected years from the prebuilt index.
+    if year_index is not None:
+        selected_years = YEARS_AVAILABLE[id(data)].intersection(years)
+
+        # Raising an error if the years selected are not found.
+        if not selected_years:
+            raise ValueError('years entered not found in the data.')
+
+        # Sorting the positions keeps the original order of the rows.
+        return data.take(np.sort(np.concatenate([year_index[year] for year in selected_years])))
+
+    # Building the mask once, it is used both to validate and to filter the years.
+    mask = data['año'].isin(frozenset(years))
+
+    # Raising an error if the years selected are not found.
+    if not mask.any():
+        raise ValueError('years entered not found in the data.')
+
+    return data.loc[mask]
 
 def cust_amt_per_capitation_type(data: pd.DataFrame, filter_: str, years=[]) -> go.Figure:
     """
@@ -29,46 +311,18 @@ def cust_amt_per_capitation_type(data: pd.DataFrame, filter_: str, years=[]) ->
         ValueError
             If the specified years are not present in the dataset.
     """
-    # Raising an error if years is not a list
-    if type(years) is not list:
-        raise ValueError('years must be a list.')
-    
-    # Raising an error if the years selected are not found.
-    if not any(data['año'].isin(years)) and len(years) > 0:
-        raise ValueError('years entered not found in the data.')
-    
-    # Filtering the data by selected years if year is in the data.
-    if set(set(years)).issubset(data['año']) and len(years) > 0:
-        data = data.loc[data['año'].isin(years)]
-
-    # Data filters.
-    default_filter = {
-        'afiliados (total)': 'Todos',
-        'afiliados (subsidiado)': 'Subsidiado',
-        'afiliados (contributivo)': 'Contributivo'
-    }
-    filters = {
-        'Subsidiado' : {'afiliados (subsidiado)': 'Subsidiado'},
-        'Contributivo' : {'afiliados (contributivo)': 'Contributivo'},
-    }
+    # Filtering the data by the selected years.
+    data = _filter_years(data, years)
 
     # Selecting the data that will be used as y axis.
-    axis_and_labels = filters.get(filter_, default_filter)
+    axis_and_labels = _AFFIL_FILTERS.get(filter_, _AFFIL_DEFAULT)
 
     # Plotting the data.
-    fig = px.line(
-        data_frame = data,
-        x = 'año',
-        y = list(axis_and_labels.keys()),
-        markers=True,
-        title='Cantidad de Afiliados',
-        labels={'value': '', 'variable':'Tipo de Regimen'}
-    )
+    fig = _multiline(data, 'año', axis_and_labels, 'Cantidad de Afiliados', 'Tipo de Regimen')
+
+    # Keeping the UI state between updates and redrawing without transitions.
+    fig.update_layout(uirevision='constant', transition_duration=0)
 
-    # Updating the legend.
-    fig.for_each_trace(
-        lambda t: t.update(name=axis_and_labels.get(t.name, t.name))
-    )
     return fig
 
 def amt_capitation_paid_per_cust_type(data: pd.DataFrame, filter_: str, years=[]) -> go.Figure:
@@ -98,44 +352,17 @@ def amt_capitation_paid_per_cust_type(data: pd.DataFrame, filter_: str, years=[]
             If none of the specified years are found in the data.
     """
     
-    # Raising an error if years is not a list
-    if type(years) is not list:
-        raise ValueError('years must be a list.')
-    
-    # Raising an error if the years selected are not found.
-    if not any(data['año'].isin(years)) and len(years) > 0:
-        raise ValueError('years entered not found in the data.')
-
-    # Filtering the data by selected years if year is in the data.
-    if set(set(years)).issubset(data['año']) and len(years) > 0:
-        data = data.loc[data['año'].isin(years)]
+    # Filtering the data by the selected years.
+    data = _filter_years(data, years)
     
-    # Data filters.
-    default_filter = {
-        'numero de cápitas pagadas (subsidiado)': 'Subsidiado',
-        'numero de cápitas pagadas (contributivo)': 'Contributivo'
-    }
-    filters = {
-        'Subsidiado' : {'numero de cápitas pagadas (subsidiado)': 'Subsidiado'},
-        'Contributivo' : {'numero de cápitas pagadas (contributivo)': 'Contributivo'},
-    }
-
     # Selecting the data that will be used as y axis.
-    axis_and_labels = filters.get(filter_, default_filter)
+    axis_and_labels = _PAID_FILTERS.get(filter_, _PAID_DEFAULT)
 
     # Plotting the data.
-    fig = px.bar(
-        data,
-        x='año',
-        y= list(axis_and_labels.keys()),
-        title='Numero de cápitas pagadas',
-        labels={'value': '', 'variable':'Tipo de Regimen'}
-    )
+    fig = _multibar(data, 'año', axis_and_labels, 'Numero de cápitas pagadas', 'Tipo de Regimen')
 
-    # Updating the legend.
-    fig.for_each_trace(
-        lambda t: t.update(name=axis_and_labels.get(t.name, t.name))
-    )
+    # Keeping the UI state between updates and redrawing without transitions.
+    fig.update_layout(uirevision='constant', transition_duration=0)
 
     return fig
 
@@ -168,43 +395,17 @@ def amt_capitation_per_gender(data: pd.DataFrame, filter_: str, years=[]) -> go.
         ValueError
             If the provided years are not found in the DataFrame.
     """
-    if type(years) is not list:
-        raise ValueError('years must be a list.')
+    # Filtering the data by the selected years.
+    data = _filter_years(data, years)
     
-    # Raising an error if the years selected are not found.
-    if not any(data['año'].isin(years)) and len(years) > 0:
-        raise ValueError('years entered not found in the data.')
-    
-    # Filtering the data by selected years if year is in the data.
-    if set(set(years)).issubset(data['año']) and len(years) > 0:
-        data = data.loc[data['año'].isin(years)]
-    
-    # Data filters.
-    default_filter = {
-        'total  (hombres)': 'Hombres',
-        'total  (mujeres)': 'Mujeres'
-    }
-    filters = {
-        'Subsidiado' : {'régimen subsidiado (hombres )': 'Hombres', 'régimen subsidiado (mujeres )': 'Mujeres',},
-        'Contributivo' : {'régimen contributivo (hombres )': 'Hombres', 'régimen contributivo (mujeres )': 'Mujeres',},
-    }
-
     # Selecting the data that will be used as y axis.
-    axis_and_labels = filters.get(filter_, default_filter)
+    axis_and_labels = _GENDER_FILTERS.get(filter_, _GENDER_DEFAULT)
 
     # Plotting the data.
-    fig = px.bar(
-        data,
-        x='año',
-        y=list(axis_and_labels.keys()),
-        barmode='group',
-        title=f'Capitas Dispersadas por Genero',
-        labels={'value':'', 'variable':'Genero'}
-    )
-    # Updating the legend.
-    fig.for_each_trace(
-        lambda t: t.update(name=axis_and_labels.get(t.name, t.name))
-    )
+    fig = _multibar(data, 'año', axis_and_labels, 'Capitas Dispersadas por Genero', 'Genero', barmode='group')
+
+    # Keeping the UI state between updates and redrawing without transitions.
+    fig.update_layout(uirevision='constant', transition_duration=0)
 
     return fig
 
@@ -232,78 +433,29 @@ def capitation_amt_per_cust_type(data: pd.DataFrame, years=[]) -> go.Figure:
             ValueError: If `years` is not a list.
             ValueError: If provided years are not found in the dataset.
     """
-    months = {
-        'enero': 1,
-        'febrero': 2,
-        'marzo': 3,
-        'abril': 4,
-        'mayo': 5,
-        'junio': 6,
-        'julio': 7,
-        'agosto': 8,
-        'septiembre': 9,
-        'octubre': 10,
-        'noviembre': 11,
-        'diciembre': 12,
-    }
     x_axis = 'año'
 
-    # Raising an error if years is not a list
-    if type(years) is not list:
-        raise ValueError('years must be a list.')
-    
-    if len(years) == 1 and not any(data['año'].isin(years)):
-        raise(ValueError('Year not found in the data.'))
-
     # If only one year was selected, filtering the data by month.
     if len(years) == 1:
         x_axis = 'meses'
         # Filtering by the selected year.
-        data = data.loc[data['año'].isin(years)]
-        # Standardizing months names. 
-        data['meses'] = data['meses'].str.strip().str.lower()
-        # Mapping the months to numbers.
-        data['meses_n'] = data['meses'].map(months)
+        data = _filter_years(data, years)
+
+        # Standardizing months names, unless it was already done when loading the data.
+        if 'mes_n' not in data.columns:
+            data = normalize_months(data)
 
         # Sorting the months in ascending order.
-        data.sort_values(by='meses_n')
+        data = data.sort_values(by='mes_n', kind='stable')
     else:
-        data = data.loc[data['meses'].str.strip() == 'Diciembre', :]
-
-        # Filtering the years selected only by the ones found in the data.
-        if not any(data['año'].isin(years)) and len(years) > 0:
-            years = list(set(data['año'].tolist()).intersection(set(years)))
-            print(years)
-        
-        data = data.loc[data['año'].isin(years)]
+        # Filtering the December rows of the selected years.
+        data = _filter_years(_december_rows(data), years)
     
-    # Data filters.
-    default_filter = {
-        ' número de cápitas dispersadas(total)': 'Total',
-        ' número de cápitas dispersadas (titulares)': 'Titulares',
-        ' número de cápitas dispersadas (dependientes directos)': 'Dependientes directos',
-        ' número de cápitas dispersadas (dependientes adicionales)': 'Dependientes adicionales'
-    }
-    filters = {
-    }
-
-    # Selecting the data that will be used as y axis.
-    axis_and_labels = filters.get('', default_filter)
-
     # Plotting the data.
-    fig = px.line(
-        data_frame = data,
-        x = x_axis,
-        y = list(axis_and_labels.keys()),
-        markers=True,
-        title=f'Número de Cápitas Dispersadas',
-        labels={'value':'', 'variable':'Categoria'}
-    )
+    fig = _multiline(data, x_axis, _CAPITATION_LABELS, 'Número de Cápitas Dispersadas', 'Categoria')
 
-    # Updating the legend.
-    fig.for_each_trace(
-        lambda t: t.update(name=axis_and_labels.get(t.name, t.name))
-    )
+    # Keeping the UI state between updates and redrawing without transitions.
+    fig.update_layout(uirevision='constant', transition_duration=0)
 
     return fig
     
@@ -341,50 +493,76 @@ def pct_money_per_cust_type(data: pd.DataFrame, years=[]) -> go.Figure:
             - The x-axis represents the percentage of the total disbursed amount.
             - The bars are stacked for titulares, dependientes directos, and dependientes adicionales.
     """
-    # Raising an error if years is not a list
-    if type(years) is not list:
-        raise ValueError('years must be a list.')
-    
-    # Raising an error if the years selected are not found.
-    if not any(data['año'].isin(years)) and len(years) > 0:
-        raise ValueError('years entered not found in the data.')
+    # Filtering the December rows of the selected years.
+    data = _filter_years(_december_rows(data), years)
 
-    # Filtering the data by selected years if year is in the data.
-    if set(set(years)).issubset(data['año']) and len(years) > 0:
-        data = data.loc[data['año'].isin(years)]
-        data = data.loc[data['meses'].str.strip() == 'Diciembre', :]
-    
-    # Calculating the percentages.
-    for column in ['dependientes directos', 'titulares', 'dependientes adicionales']:
-        data[f'total de monto dispersado RD$ ({column}) %'] = round((data[f'total de monto dispersado RD$ ({column})']/
-            data['total de monto dispersado RD$ (Total)']) * 100, 2)
-    
-    # Filtering the data to extract the data from december.
-    data = data.loc[data['meses'].str.strip() == 'Diciembre', :]
+    # Calculating the percentages, unless they were precomputed when loading the data.
+    if not set(_PCT_LABELS).issubset(data.columns):
+        data = add_pct_columns(data)
 
-    data['año'] = data['año'].astype('str')
-
-    labels = {
-        'total de monto dispersado RD$ (titulares) %': 'Titulares',
-        'total de monto dispersado RD$ (dependientes directos) %': 'Dependientes directos',
-        'total de monto dispersado RD$ (dependientes adicionales) %': 'Dependientes adicionales'
-    }
+    # Using the years as categories of the y axis.
+    data = data.assign(año=data['año'].astype('str'))
 
     # Creating the figure.
-    fig = px.bar(
+    fig = _multibar(
         data,
-        y='año',
-        x=['total de monto dispersado RD$ (titulares) %',
-            'total de monto dispersado RD$ (dependientes directos) %',
-            'total de monto dispersado RD$ (dependientes adicionales) %'],
+        'año',
+        _PCT_LABELS,
+        '% Monto Dispersado',
+        'Categoria',
         barmode='stack',
-        title=f'% Monto Dispersado',
-        labels={'value':'', 'variable':'Categoria'}
+        orientation='h'
     )
 
-    # Updating the legend.
-    fig.for_each_trace(
-        lambda t: t.update(name=labels.get(t.name, t.name))
-    )
+    # Keeping the UI state between updates and redrawing without transitions.
+    fig.update_layout(uirevision='constant', transition_duration=0)
 
-    return fig
\ No newline at end of file
+    return fig
+
+@lru_cache(maxsize=64)
+def cached_cust_amt_per_capitation_type(dataset_id: str, filter_: str, years: tuple) -> go.Figure:
+    """
+        Memoized version of `cust_amt_per_capitation_type` over the registered dataset `dataset_id`.
+    """
+    return cust_amt_per_capitation_type(DATASETS[dataset_id], filter_, list(years))
+
+@lru_cache(maxsize=64)
+def cached_amt_capitation_paid_per_cust_type(dataset_id: str, filter_: str, years: tuple) -> go.Figure:
+    """
+        Memoized version of `amt_capitation_paid_per_cust_type` over the registered dataset `dataset_id`.
+    """
+    return amt_capitation_paid_per_cust_type(DATASETS[dataset_id], filter_, list(years))
+
+@lru_cache(maxsize=64)
+def cached_amt_capitation_per_gender(dataset_id: str, filter_: str, years: tuple) -> go.Figure:
+    """
+        Memoized version of `amt_capitation_per_gender` over the registered dataset `dataset_id`.
+    """
+    return amt_capitation_per_gender(DATASETS[dataset_id], filter_, list(years))
+
+@lru_cache(maxsize=64)
+def cached_capitation_amt_per_cust_type(dataset_id: str, years: tuple) -> go.Figure:
+    """
+        Memoized version of `capitation_amt_per_cust_type` over the registered dataset `dataset_id`.
+    """
+    return capitation_amt_per_cust_type(DATASETS[dataset_id], list(years))
+
+@lru_cache(maxsize=64)
+def cached_pct_money_per_cust_type(dataset_id: str, years: tuple) -> go.Figure:
+    """
+        Memoized version of `pct_money_per_cust_type` over the registered dataset `dataset_id`.
+    """
+    return pct_money_per_cust_type(DATASETS[dataset_id], list(years))
+
+def clear_chart_caches() -> None:
+    """
+        Clears the memoized figures. Must be called every time the datasets in `DATASETS` are reloaded.
+    """
+    for cached_chart in (
+        cached_cust_amt_per_capitation_type,
+        cached_amt_capitation_paid_per_cust_type,
+        cached_amt_capitation_per_gender,
+        cached_capitation_amt_per_cust_type,
+        cached_pct_money_per_cust_type,
+    ):
+        cached_chart.cache_clear()
@@ -1,44 +1,331 @@
-from dash import dcc, html, Dash
-import plotly.express as px
+from dash import dcc, html, Dash, Patch, ClientsideFunction, no_update
 import pandas as pd
+import numpy as np
+import os
+from concurrent.futures import ThreadPoolExecutor
 import dash_bootstrap_components as dbc
+from plotly_resampler import FigureResampler
 from dash_bootstrap_templates import load_figure_template
-from .charts import *
-from dash.dependencies import Input, Output
+from .charts import (
+    DATASETS,
+    DECEMBER_ROWS,
+    YEAR_INDEX,
+    YEARS_AVAILABLE,
+    add_pct_columns,
+    normalize_months,
+    clear_chart_caches,
+    cust_amt_per_capitation_type,
+    amt_capitation_paid_per_cust_type,
+    amt_capitation_per_gender,
+    capitation_amt_per_cust_type,
+    pct_money_per_cust_type,
+    cached_cust_amt_per_capitation_type,
+    cached_amt_capitation_paid_per_cust_type,
+    cached_amt_capitation_per_gender,
+    cached_capitation_amt_per_cust_type,
+    cached_pct_money_per_cust_type,
+)
+from dash.dependencies import Input, Output, State
+
+# Columns used by the charts of each processed file.
+REQUIRED_COLS_ONE0 = [
+    'año',
+    'afiliados (total)',
+    'afiliados (subsidiado)',
+    'afiliados (contributivo)',
+    'numero de cápitas pagadas (subsidiado)',
+    'numero de cápitas pagadas (contributivo)',
+]
+REQUIRED_COLS_ONE1 = [
+    'año',
+    'total  (hombres)',
+    'total  (mujeres)',
+    'régimen subsidiado (hombres )',
+    'régimen subsidiado (mujeres )',
+    'régimen contributivo (hombres )',
+    'régimen contributivo (mujeres )',
+]
+REQUIRED_COLS_ONE2 = [
+    'año',
+    'meses',
+    ' número de cápitas dispersadas(total)',
+    ' número de cápitas dispersadas (titulares)',
+    ' número de cápitas dispersadas (dependientes directos)',
+    ' número de cápitas dispersadas (dependientes adicionales)',
+    'total de monto dispersado RD$ (Total)',
+    'total de monto dispersado RD$ (titulares)',
+    'total de monto dispersado RD$ (dependientes directos)',
+    'total de monto dispersado RD$ (dependientes adicionales)',
+]
+
+# Plotly config shared by all the graphs, WebGL traces are rendered at a 1:1 pixel ratio.
+GRAPH_CONFIG = {'staticPlot': False, 'plotGlPixelRatio': 1}
+
+# Values of the regime type radio buttons.
+REGIME_TYPES = ('Subsidiado', 'Contributivo', 'Todos')
+
+# Figures of every regime type and range of years, indexed by (filter_, (first_year, last_year)).
+FIGURE_CACHE = {}
+
+# Directory of the Parquet copies of the processed Excel files that have no modeled Parquet file.
+EXCEL_CACHE_DIR = 'data/cache/excel'
+
+def _ensure_parquet(xlsx_path: str) -> str:
+    """
+        Returns the Parquet file with the processed data of an Excel path.
+
+        The Parquet file written by `ModelData.model_and_save_data`, next to the Excel file with the same
+        name, is the source of truth and is always used when it exists. Otherwise the Excel file is
+        converted to a Parquet copy in `EXCEL_CACHE_DIR`, only when the copy is missing or older than the
+        Excel file.
+
+        Parameters:
+        - xlsx_path (str): Path of the Excel file.
+
+        Returns:
+        - str: Path of the Parquet file to read.
+    """
+    modeled_path = os.path.splitext(xlsx_path)[0] + '.parquet'
+    if os.path.exists(modeled_path):
+        return modeled_path
+
+    parquet_path = os.path.join(EXCEL_CACHE_DIR, os.path.splitext(os.path.basename(xlsx_path))[0] + '.parquet')
+
+    # Writing the Parquet copy only when the Excel file changed since the last conversion.
+    if not os.path.exists(parquet_path) or os.path.getmtime(parquet_path) < os.path.getmtime(xlsx_path):
+        os.makedirs(EXCEL_CACHE_DIR, exist_ok=True)
+        pd.read_excel(xlsx_path).to_parquet(parquet_path, engine='pyarrow', compression='zstd')
+
+    return parquet_path
 
 def load_data():
     """
         Loads and processes Excel datasets from predefined file paths, and sets global variables.
 
         This function performs the following tasks:
-        - Loads three Excel files into global DataFrames: `one0`, `one1`, and `one2`.
+        - Loads three Excel files into global DataFrames: `one0`, `one1`, and `one2`. The files are read
+        from a Parquet copy (created on the first run and whenever the Excel file changes), loading only
+        the columns used by the charts. Years are stored as ordered categories of int16 values and the
+        remaining numeric columns as int32/float32.
+        - Normalizes the month names of `one2` once, adding their number in 'mes_n'.
+        - Aggregates the display table of every chart, with one row per year, so the callbacks only slice
+        small precomputed tables. The December table of `one2` also holds the disbursement percentages.
+        - Registers the DataFrames used by the memoized charts and clears any previously cached figure,
+        including the precomputed `FIGURE_CACHE`.
+        - Indexes the row positions and the set of years of each DataFrame, so the charts can validate
+        and gather the rows of the selected years without scanning the 'año' column.
         - Sets a global float display format to two decimal places for all pandas DataFrames.
         - Extracts all unique years from the 'año' column across the three datasets and stores them 
-        in a global set variable `available_years`.
+        in a global sorted tuple `available_years`, along with the slider bounds and marks.
 
         Global Variables:
         - one0 (pd.DataFrame): Data loaded from 'one 0.xlsx'.
         - one1 (pd.DataFrame): Data loaded from 'one 1.xlsx'.
         - one2 (pd.DataFrame): Data loaded from 'one 2.xlsx'.
-        - available_years (set): Set of all unique years found in the 'año' column across all three datasets.
+        - DISP_AFFIL (pd.DataFrame): Affiliates per year and regime.
+        - DISP_PAID (pd.DataFrame): Capitations paid per year and regime.
+        - DISP_GENDER (pd.DataFrame): Affiliates per year, regime and gender.
+        - DISP_DEC (pd.DataFrame): December capitations and disbursed amounts per year, with percentages.
+        - available_years (tuple): Sorted unique years found in the 'año' column across all three datasets.
+        - MIN_YEAR (int): First available year.
+        - MAX_YEAR (int): Last available year.
+        - YEAR_MARKS (dict): Slider marks, one for every even year.
 
         Note:
             The function assumes the Excel files are located relative to the script path at:
             '../../data/processed/one/' and each file contains a column named 'año'.
     """
-    global one0, one1, one2, available_years
+    global one0, one1, one2, DISP_AFFIL, DISP_PAID, DISP_GENDER, DISP_DEC
+    global available_years, MIN_YEAR, MAX_YEAR, YEAR_MARKS
 
     # Reading all files
-    one0 = pd.read_excel('data/processed/one/one 0.xlsx')
-    one1 = pd.read_excel('data/processed/one/one 1.xlsx')
-    one2 = pd.read_excel('data/processed/one/one 2.xlsx')
-    
+    one0 = pd.read_parquet(_ensure_parquet('data/processed/one/one 0.xlsx'), columns=REQUIRED_COLS_ONE0)
+    one1 = pd.read_parquet(_ensure_parquet('data/processed/one/one 1.xlsx'), columns=REQUIRED_COLS_ONE1)
+    one2 = pd.read_parquet(_ensure_parquet('data/processed/one/one 2.xlsx'), columns=REQUIRED_COLS_ONE2)
+
+    # Downcasting the numeric columns to halve the memory moved on every filter.
+    for df in (one0, one1, one2):
+        df['año'] = df['año'].astype(np.int16)
+        int_cols = df.select_dtypes(include='int64').columns
+        float_cols = df.select_dtypes(include='float64').columns
+        df[int_cols] = df[int_cols].astype(np.int32)
+        df[float_cols] = df[float_cols].astype(np.float32)
+
+        # Storing the years as ordered categories, so filtering and grouping work over their codes.
+        df['año'] = df['año'].astype(pd.CategoricalDtype(sorted(df['año'].unique()), ordered=True))
+
+    # Standardizing the months, so the charts avoid string operations.
+    try:
+        one2 = normalize_months(one2)
+    except ValueError as error:
+        raise ValueError(f"data/processed/one/one 2.xlsx has {error}") from error
+
+    # Aggregating the tables displayed by each chart.
+    DISP_AFFIL = one0[
+        ['año', 'afiliados (total)', 'afiliados (subsidiado)', 'afiliados (contributivo)']
+    ].groupby('año', as_index=False, observed=True).sum()
+    DISP_PAID = one0[
+        ['año', 'numero de cápitas pagadas (subsidiado)', 'numero de cápitas pagadas (contributivo)']
+    ].groupby('año', as_index=False, observed=True).sum()
+    DISP_GENDER = one1.groupby('año', as_index=False, observed=True).sum()
+    DISP_DEC = add_pct_columns(
+        one2.loc[one2['mes_n'] == 12]
+        .drop(columns=['meses', 'mes_n'])
+        .groupby('año', as_index=False, observed=True)
+        .sum()
+    )
+
+    DECEMBER_ROWS.clear()
+    DECEMBER_ROWS[id(one2)] = DISP_DEC
+
+    # Registering the datasets for the memoized charts, figures built from the old data are discarded.
+    DATASETS.clear()
+    DATASETS.update({'affil': DISP_AFFIL, 'paid': DISP_PAID, 'gender': DISP_GENDER, 'one2': one2})
+    clear_chart_caches()
+    FIGURE_CACHE.clear()
+
+    # Indexing the rows of every year.
+    YEAR_INDEX.clear()
+    YEAR_INDEX.update({
+        id(df): {int(y): np.where(df['año'].to_numpy() == y)[0] for y in np.unique(df['año'])}
+        for df in (DISP_AFFIL, DISP_PAID, DISP_GENDER, one2, DISP_DEC)
+    })
+    YEARS_AVAILABLE.clear()
+    YEARS_AVAILABLE.update({df_id: frozenset(index) for df_id, index in YEAR_INDEX.items()})
+
     pd.options.display.float_format = '{:.2f}'.format
 
     # Obtaining the list of available years.
-    available_years = {int(x) for df in [one0, one1, one2] for x in df['año'].unique().tolist()}
+    years_np = np.unique(np.concatenate([df['año'].to_numpy(dtype=np.int32) for df in (one0, one1, one2)]))
+    available_years = tuple(int(x) for x in years_np)
+
+    # Precomputing the slider bounds and marks (shows marks every 2 years).
+    MIN_YEAR, MAX_YEAR = available_years[0], available_years[-1]
+    YEAR_MARKS = {year: str(year) for year in available_years if year % 2 == 0}
+
+def _build_charts(filter_: str, years: list) -> tuple:
+    """
+        Generates a collection of charts based on provided filter and years.
+
+        This function creates multiple visualizations using the display tables built by `load_data`
+        and a the typer of regime and list of years. Each chart corresponds to a specific aspect of the data.
+
+        Parameters:
+        - filter_ (str): A string filter used to segment or filter the data.
+        - years (list): The first and last year (int) of the range used to filter the data.
+
+        Returns:
+        - tuple: A tuple containing the generated figures in the order of the dashboard graphs.
+    """
+    # Returning the precomputed figures of the selection.
+    figs = FIGURE_CACHE.get((filter_, (int(years[0]), int(years[1]))))
+    if figs is not None:
+        return figs
+
+    # Creating the range of years, as a tuple so it can be used as a cache key.
+    years_key = tuple(range(int(years[0]), int(years[1]) + 1))
 
+    # Constructing all charts, reusing the figures of previously visited selections.
+    return (
+        cached_cust_amt_per_capitation_type('affil', filter_, years_key),
+        cached_amt_capitation_paid_per_cust_type('paid', filter_, years_key),
+        cached_amt_capitation_per_gender('gender', filter_, years_key),
+        cached_capitation_amt_per_cust_type('one2', years_key),
+        cached_pct_money_per_cust_type('one2', years_key),
+    )
+
+def _precompute_range(first_year: int, last_year: int) -> dict:
+    """
+        Builds the charts of every regime type for a range of years.
+
+        Parameters:
+        - first_year (int): First year of the range.
+        - last_year (int): Last year of the range.
+
+        Returns:
+        - dict: The figures of each regime type, indexed as in `FIGURE_CACHE`. Selections whose charts
+        can't be built (years not found in the data) are left out.
+    """
+    years = list(range(first_year, last_year + 1))
+    figures = {}
 
+    # The charts of `one2` don't depend on the regime type, they are shared by all the selections.
+    try:
+        capitation_fig = capitation_amt_per_cust_type(one2, years)
+        pct_fig = pct_money_per_cust_type(one2, years)
+    except ValueError:
+        return figures
+
+    for filter_ in REGIME_TYPES:
+        try:
+            figures[(filter_, (first_year, last_year))] = (
+                cust_amt_per_capitation_type(DISP_AFFIL, filter_, years),
+                amt_capitation_paid_per_cust_type(DISP_PAID, filter_, years),
+                amt_capitation_per_gender(DISP_GENDER, filter_, years),
+                capitation_fig,
+                pct_fig,
+            )
+        except ValueError:
+            continue
+
+    return figures
+
+def _precompute_figures() -> None:
+    """
+        Fills `FIGURE_CACHE` with the charts of every regime type and every range of years reachable
+        with the year slider, so the callbacks only need a dictionary lookup.
+
+        Must be called after `load_data` and after the figure template is loaded, since the figures
+        keep the template active when they are created.
+    """
+    ranges = [
+        (first_year, last_year)
+        for first_year in range(MIN_YEAR, MAX_YEAR + 1)
+        for last_year in range(first_year, MAX_YEAR + 1)
+    ]
+
+    # Building the ranges concurrently.
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for figures in executor.map(lambda years: _precompute_range(*years), ranges):
+            FIGURE_CACHE.update(figures)
+
+def _patch_traces(fig) -> Patch:
+    """
+        Creates a partial update that only replaces the data of the traces of a figure.
+
+        Parameters:
+        - fig (go.Figure): Figure holding the new data, with the same traces as the figure displayed.
+
+        Returns:
+        - Patch: A Patch replacing the x and y arrays of every trace and the x axis title.
+    """
+    patched = Patch()
+
+    for i, trace in enumerate(fig.data):
+        patched['data'][i]['x'] = trace.x
+        patched['data'][i]['y'] = trace.y
+
+    # The x axis changes from years to months when a single year is selected.
+    patched['layout']['xaxis']['title']['text'] = fig.layout.xaxis.title.text
+
+    return patched
+
+def _resample_patch(fig, relayout_data: dict):
+    """
+        Creates a partial update with the resampled data of the window visible in a line chart.
+
+        Parameters:
+        - fig (go.Figure): Figure displayed in the graph.
+        - relayout_data (dict): The `relayoutData` of the graph, holding the new ranges of the axes.
+
+        Returns:
+        - Patch: A Patch replacing the data of the resampled traces, or `no_update` when the figure
+        isn't resampled or the traces don't change.
+    """
+    if not isinstance(fig, FigureResampler) or not relayout_data:
+        return no_update
+
+    return fig.construct_update_data_patch(relayout_data)
 
 def show_dashboard():
     # Creating the dashboard layout.
@@ -46,6 +333,9 @@ def show_dashboard():
 
     load_figure_template('COSMO')
 
+    # Building all the charts before starting the app.
+    _precompute_figures()
+
     app = Dash(__name__, external_stylesheets=[dbc.themes.COSMO, dbc_css])
 
     app.layout = dbc.Container([
@@ -55,13 +345,14 @@ def show_dashboard():
                 html.H1("Año"),
                 dcc.RangeSlider(
                     id='YearPicker',
-                    min=min(available_years),
-                    max=max(available_years),
+                    min=MIN_YEAR,
+                    max=MAX_YEAR,
                     step=1,
-                    value=[min(available_years), max(available_years)],
-                    # show marks every 2 years
-                    marks={year: str(year) for year in available_years if year % 2 == 0}
+                    value=[MIN_YEAR, MAX_YEAR],
+                    marks=YEAR_MARKS
                 ), 
+                # Slider value, updated only once the slider stops moving.
+                dcc.Store(id='YearPickerDebounced', data=[MIN_YEAR, MAX_YEAR]),
             ]),
             # Radio buttons to filter the regime type.
             dbc.Col([
@@ -83,27 +374,34 @@ def show_dashboard():
         ]),
         # Adding charts
         dbc.Row([
-            dcc.Graph(id='AffiliatePerYear'),
+            dcc.Graph(id='AffiliatePerYear', config=GRAPH_CONFIG),
             # Creating rows and columns to separate the charts.
             dbc.Row([
                 dbc.Col([
-                    dcc.Graph(id='CapitalizationPerCustType'),
+                    dcc.Graph(id='CapitalizationPerCustType', config=GRAPH_CONFIG),
                 ]),
                 dbc.Col([
-                    dcc.Graph(id='CapitalizationPerGender'),
+                    dcc.Graph(id='CapitalizationPerGender', config=GRAPH_CONFIG),
                 ]),
             ]),
             dbc.Row([
                 dbc.Col([
-                    dcc.Graph(id='AmtCapitationsPerCustType'),
+                    dcc.Graph(id='AmtCapitationsPerCustType', config=GRAPH_CONFIG),
                 ]),
                 dbc.Col(
-                    dcc.Graph(id='MoneyCollectedPerCustType')
+                    dcc.Graph(id='MoneyCollectedPerCustType', config=GRAPH_CONFIG)
                 )
             ]),
         ]),
     ])
 
+    # Debouncing the slider in the browser.
+    app.clientside_callback(
+        ClientsideFunction(namespace='debounce', function_name='apply'),
+        Output('YearPickerDebounced', 'data'),
+        Input('YearPicker', 'value'),
+    )
+
     @app.callback(
             [
                 Output('AffiliatePerYear', 'figure'), 
@@ -114,36 +412,95 @@ def show_dashboard():
             ],
             [
                 Input('RegimeType', 'value'),
-                Input('YearPicker', 'value'),
+                State('YearPickerDebounced', 'data'),
             ]
     )
-    def create_charts(filter_: str, years: list) -> None:
+    def create_charts(filter_: str, years: list) -> tuple:
         """
-            Generates a collection of charts based on provided filter and years.
+            Rebuilds the charts when the type of regime changes, since the traces displayed change.
 
-            This function creates multiple visualizations using pre-loaded datasets (`one0`, `one1`, `one2`)
-            and a the typer of regime and list of years. Each chart corresponds to a specific aspect of the data.
+            Parameters:
+            - filter_ (str): A string filter used to segment or filter the data.
+            - years (list): The first and last year (int) selected.
+
+            Returns:
+            - tuple: A tuple containing the generated figures.
+        """
+        return _build_charts(filter_, years)
+
+    @app.callback(
+            [
+                Output('AffiliatePerYear', 'figure', allow_duplicate=True), 
+                Output('CapitalizationPerCustType', 'figure', allow_duplicate=True), 
+                Output('CapitalizationPerGender', 'figure', allow_duplicate=True), 
+                Output('AmtCapitationsPerCustType', 'figure', allow_duplicate=True),
+                Output('MoneyCollectedPerCustType', 'figure', allow_duplicate=True)
+            ],
+            [
+                Input('YearPickerDebounced', 'data'),
+                State('RegimeType', 'value'),
+            ],
+            prevent_initial_call=True
+    )
+    def update_charts_years(years: list, filter_: str) -> tuple:
+        """
+            Updates the charts when the range of years changes, sending only the new data of the traces
+            instead of the whole figures.
 
             Parameters:
+            - years (list): The first and last year (int) selected.
             - filter_ (str): A string filter used to segment or filter the data.
-            - years (list): A list of years (int) used to filter the data before generating the charts.
 
             Returns:
-            - tuple: A tuple containing the generated figures in the following order.
+            - tuple: A tuple containing a Patch for every chart.
         """
-        # Creating the range of years.
-        years = [year for year in range(int(years[0]), int(years[1]) + 1, 1)]
-
-        # Constructing all charts.
-        figs = (
-            cust_amt_per_capitation_type(one0, filter_, years),
-            amt_capitation_paid_per_cust_type(one0, filter_, years),
-            amt_capitation_per_gender(one1, filter_, years),
-            capitation_amt_per_cust_type(one2, years),
-            pct_money_per_cust_type(one2, years),
-        )
+        return tuple(_patch_traces(fig) for fig in _build_charts(filter_, years))
 
-        return figs
+    @app.callback(
+            Output('AffiliatePerYear', 'figure', allow_duplicate=True),
+            [
+                Input('AffiliatePerYear', 'relayoutData'),
+                State('RegimeType', 'value'),
+                State('YearPickerDebounced', 'data'),
+            ],
+            prevent_initial_call=True
+    )
+    def resample_affiliates(relayout_data: dict, filter_: str, years: list):
+        """
+            Sends the resampled data of the affiliates chart when it is zoomed or panned.
+
+            Parameters:
+            - relayout_data (dict): The new ranges of the axes.
+            - filter_ (str): A string filter used to segment or filter the data.
+            - years (list): The first and last year (int) selected.
+
+            Returns:
+            - Patch: A Patch with the data of the visible window.
+        """
+        return _resample_patch(_build_charts(filter_, years)[0], relayout_data)
+
+    @app.callback(
+            Output('AmtCapitationsPerCustType', 'figure', allow_duplicate=True),
+            [
+                Input('AmtCapitationsPerCustType', 'relayoutData'),
+                State('RegimeType', 'value'),
+                State('YearPickerDebounced', 'data'),
+            ],
+            prevent_initial_call=True
+    )
+    def resample_capitations(relayout_data: dict, filter_: str, years: list):
+        """
+            Sends the resampled data of the capitations chart when it is zoomed or panned.
+
+            Parameters:
+            - relayout_data (dict): The new ranges of the axes.
+            - filter_ (str): A string filter used to segment or filter the data.
+            - years (list): The first and last year (int) selected.
+
+            Returns:
+            - Patch: A Patch with the data of the visible window.
+        """
+        return _resample_patch(_build_charts(filter_, years)[3], relayout_data)
 
     app.run(jupyter_mode='tab', port=8071)
 
@@ -1,19 +1,89 @@
 import pandas as pd
-import numpy as np
+from python_calamine import CalamineError
 from typing import List
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import hashlib
 import os
+import warnings
+
+# The module is also run as a script (`python src/modeling/data_cleaning.py`), outside of its package.
+try:
+    from .one_cleaner import clean_one_frame
+except ImportError:
+    from one_cleaner import clean_one_frame
+
+# Number of each month, as written in the CNSS files.
+MONTHS = {
+    'enero': 1,
+    'febrero': 2,
+    'marzo': 3,
+    'abril': 4,
+    'mayo': 5,
+    'junio': 6,
+    'julio': 7,
+    'agosto': 8,
+    'septiembre': 9,
+    'octubre': 10,
+    'noviembre': 11,
+    'diciembre': 12,
+}
+
+# Directory where the modeled files are stored, so they are only modeled again when they change.
+CACHE_DIR = 'data/cache'
+
+# Version of the cached files, part of the cache key. Must be bumped whenever anything that shapes the
+# cached data changes: the reader (`ModelData._read`), `ModelData._model_ONE_data`, `clean_one_frame` in
+# `one_cleaner.py` or the typing done in `ModelData._cached_model_ONE`.
+CACHE_VERSION = 2
 
 class ModelData:
+    @classmethod
+    @lru_cache(maxsize=None)
+    def _read(cls, path: str, mtime: float) -> pd.DataFrame:
+        """
+            Reads a dataset from an Excel file, falling back to CSV if it can't be read as Excel.
+
+            The result is memoized by path and modification time, so a file is only parsed again when it
+            changes. It must not be modified, use `_read_data` to get a copy.
+
+            Parameters:
+            path : str
+                The file path of the dataset. The function supports `.xlsx` and `.csv` formats.
+            mtime : float
+                The modification time of the file.
+
+            Returns:
+            pd.DataFrame
+                The raw data of the file.
+        """
+        try:
+            return pd.read_excel(path, engine='calamine')
+        except CalamineError:
+            # Reading the CSV files as text, the numbers are typed by the modeling functions.
+            return pd.read_csv(path, dtype=str, engine='c', memory_map=True)
+
+    @classmethod
+    def _read_data(cls, path: str) -> pd.DataFrame:
+        """
+            Returns a copy of the raw data of a file, parsing it only if it changed since the last read.
+
+            Parameters:
+            path : str
+                The file path of the dataset. The function supports `.xlsx` and `.csv` formats.
+
+            Returns:
+            pd.DataFrame
+                The raw data of the file.
+        """
+        return cls._read(path, os.path.getmtime(path)).copy()
+
     def _model_ONE_data(self, path: str) -> pd.DataFrame:
         """
             Reads and processes a dataset from an Excel or CSV file, transforming it into a structured DataFrame.
 
-            The function:
-            1. Reads the data from the provided file path, attempting to load it as an Excel file first and falling back to CSV if necessary.
-            2. Removes unwanted rows from the beginning and end of the dataset.
-            3. Iterates through the rows to dynamically generate column names based on non-null values in the first column.
-            4. Ensures column names are unique by appending an index if duplicates exist.
-            5. Transposes the processed data and removes the index column.
+            The data is read from the provided file path, attempting to load it as an Excel file first and falling
+            back to CSV if necessary, and cleaned with `clean_one_frame`.
 
             Parameters:
             paths : str
@@ -27,69 +97,61 @@ class ModelData:
             ValueError
                 If the file format is invalid or unreadable.
         """
-        raw_column_name = ''
         # Reading the data.
-        try:
-            data = pd.read_excel(path, engine='openpyxl')
-        except ValueError:
-            data = pd.read_csv(path).reset_index(drop=True)
+        data = self._read_data(path)
 
-        # Finding the start of our data.
-        try:
-            index_ = list(data.iloc[:,0].str.lower().str.strip()).index('años')
-        except ValueError:
-            index_ = list(data.iloc[:,0].str.lower().str.strip()).index('año')
+        return clean_one_frame(data)
 
-        # Filtering the unwanted rows
-        data = data.iloc[index_:-3]
-        
-        # Iterating over the data rows.
-        for i in range(data.shape[0]):
-            # If the cell is not a null value is considered as a valid title.
-            if pd.notna(data.iloc[i, 0]):
-                raw_column_name = data.iloc[i, 0]
-            
-            # Creating the column name.
-            column_name = f'{raw_column_name} ({data.iloc[i, 1]})'
+    @staticmethod
+    def _cache_path(path: str, stat: os.stat_result) -> str:
+        """
+            Returns the path of the cached copy of a modeled file.
+
+            Parameters:
+            path : str
+                The file path of the dataset.
+            stat : os.stat_result
+                The stat of the file.
 
-            # If column name exist add an index number to differentiate it from the other columns.
-            if column_name in data.iloc[:, 1].values: 
-                column_name += f' {i}'
+            Returns:
+            str
+                A Parquet file in `CACHE_DIR`, named after a hash of `CACHE_VERSION`, the path, the
+                modification time and the size of the file.
+        """
+        key = f'{CACHE_VERSION}:{path}:{stat.st_mtime}:{stat.st_size}'
 
-            # Title is added to the sub title to have the column name.
-            data.iloc[i, 1] = column_name
-            
-        # Transposing and filtering the data.
-        data = data.iloc[:, 1:].T.reset_index(drop=True)
+        return os.path.join(CACHE_DIR, hashlib.blake2b(key.encode(), digest_size=16).hexdigest() + '.parquet')
 
-        # Obtaining the column headers.
-        headers = data.iloc[0]
-        # Replacing the headers.
-        data.columns = headers
+    def _cached_model_ONE(self, path: str, stat: os.stat_result = None) -> pd.DataFrame:
+        """
+            Returns the modeled data of a ONE file, reading it from the cache when the file hasn't changed.
 
-        # # Dropping unwanted rows.
-        data.drop(labels=0, inplace=True)
-        
-        # Filling the missing years.
-        data.iloc[:, 0] = data.iloc[:, 0].fillna(method='ffill')
-        
-        # Filtering rows.
-        data = data[(data.iloc[:, 1].str.strip() == 'Cuarto trimestre') | (data.iloc[:, 1].isna())]
+            The cached copy is found with `_cache_path`. If there's no cached copy, the file is modeled with
+            `_model_ONE_data` and saved as Parquet in `CACHE_DIR`. The columns are typed the same way in both cases.
 
-        # Dropping unwanted columns
-        if any(['Años (nan) 1' == column or 'Año (nan) 1' == column for column in data.columns]):
-            try:
-                data.drop('Años (nan) 1', axis=1, inplace=True)
-            except KeyError:
-                data.drop('Año (nan) 1', axis=1, inplace=True)
+            Parameters:
+            path : str
+                The file path of the dataset to be loaded.
+            stat : os.stat_result, optional
+                The stat of the file, if it's already known (e.g. from `os.scandir`).
+
+            Returns:
+            pd.DataFrame
+                The modeled data of the file.
+        """
+        cache_path = self._cache_path(path, stat if stat is not None else os.stat(path))
 
-        # Cleaning extra characters.
-        data.iloc[:, 0] = data.iloc[:, 0].astype(str).str.replace('*', '', regex=False).astype(float)
+        # Reading the cached data.
+        if os.path.exists(cache_path):
+            return pd.read_parquet(cache_path, engine='pyarrow')
+
+        # Typing the object columns holding numbers, as they are read back from Parquet.
+        data = self._model_ONE_data(path).infer_objects()
+
+        # Saving the modeled data for the next runs.
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        data.to_parquet(cache_path, engine='pyarrow', compression='zstd')
 
-        # Standardizing the column names.
-        columns = ['año' if 'año' in column.lower() else column.lower() for column in  data.columns]
-        data.columns = columns
-        
         return data
 
     def _model_CNSS_data(self, paths: List[str]) -> pd.DataFrame:
@@ -100,11 +162,9 @@ class ModelData:
             The function performs the following steps:
             1. Reads multiple data files (Excel or CSV) from the provided paths.
             2. Standardizes column names by converting them to lowercase and replacing "meses" with "mes".
-            3. Creates a new "fecha" column by combining "año" and "mes" as a string.
-            4. Drops the original "año" and "mes" columns after creating "fecha".
-            5. Merges all processed dataframes on the "fecha" column.
-            6. Splits "fecha" into separate "año" (year) and "mes" (month) columns.
-            7. Drops the "fecha" column before returning the final processed dataframe.
+            3. Replaces the months by their number and uses "año" and "mes" as a sorted index.
+            4. Joins all processed dataframes on that index in a single alignment.
+            5. Moves "año" (year) and "mes" (month number) back to columns.
 
             Parameters:
             *kargs : tuple
@@ -116,47 +176,53 @@ class ModelData:
 
             Raises:
             ValueError:
-                If a file cannot be read as an Excel or CSV file.
+                If a file cannot be read as an Excel or CSV file, or has month names that are not in `MONTHS`.
             KeyError:
                 If required columns ("año", "mes") are missing in any dataframe.
         """
-        raw_dataframes = []
         processed_dataframes = []
         
-        # Reading and appending all dataframes.
-        for path in paths:
-            try:
-                data = pd.read_excel(path, engine='openpyxl')
-            except ValueError:
-                data = pd.read_csv(path)
-            
-            # Saving the data in memory.
-            raw_dataframes.append(data)
+        # Reading all dataframes concurrently.
+        with ThreadPoolExecutor(max_workers=max(1, min(len(paths), os.cpu_count()))) as executor:
+            raw_dataframes = list(executor.map(self._read_data, paths))
 
-        for dataframe in raw_dataframes:
+        for path, dataframe in zip(paths, raw_dataframes):
             # Standardizing columns names.
-            columns = ['mes' if column.lower().strip() == 'meses' else column.lower().strip() for column in dataframe.columns]
+            columns = dataframe.columns.str.lower().str.strip()
             # Updating the columns names.
-            dataframe.columns = columns
-            # Creating a new column combining the year and month.
-            dataframe['fecha'] = dataframe['año'].astype('str') + ' ' + dataframe['mes']
-
-            # Dropping the month and year
-            dataframe.drop(['año', 'mes'], axis=1, inplace=True)
+            dataframe.columns = columns.where(columns != 'meses', 'mes')
+            # Replacing the months by their number.
+            months = dataframe['mes'].str.lower().str.strip().str.replace('*', '', regex=False)
+            month_numbers = months.map(MONTHS)
+            # Raising an error naming the months that are not in MONTHS, instead of failing on the cast.
+            unknown = months[month_numbers.isna()].unique().tolist()
+            if unknown:
+                raise ValueError(f'{path} has unknown months: {unknown}')
+            dataframe['mes'] = month_numbers.astype('int8')
+            # Typing the year and the amounts, which are text when read from CSV. Columns that are not
+            # numeric are kept as they are.
+            for column in dataframe.select_dtypes('object').columns.drop('mes', errors='ignore'):
+                try:
+                    dataframe[column] = pd.to_numeric(dataframe[column])
+                except (ValueError, TypeError):
+                    continue
+
+            # The sorted year and month are used as index to align the files.
+            dataframe.set_index(['año', 'mes'], inplace=True)
+            dataframe.sort_index(kind='stable', inplace=True)
+
+            # Each date should be unique, the repeated ones are kept in the join but reported.
+            if dataframe.index.has_duplicates:
+                repeated = dataframe.index[dataframe.index.duplicated()].unique().tolist()
+                warnings.warn(f'{path} has repeated dates (año, mes): {repeated}')
 
             processed_dataframes.append(dataframe)
         
-        # Merging the data.
-        data = processed_dataframes[0]
-        
-        for dataframe in processed_dataframes[1:]: 
-            data = pd.merge(data, dataframe, on='fecha')
+        # Aligning all the data on the dates at once.
+        data = processed_dataframes[0].join(processed_dataframes[1:], how='inner')
 
-        # Splitting the date into year and month.
-        data[['año', 'mes']] = data['fecha'].str.split(' ', expand=True, n=1)
-
-        # Dropping "date" columns.
-        data.drop('fecha', axis=1, inplace=True)
+        # Moving the year and month back to columns.
+        data.reset_index(inplace=True)
         
         return data
 
@@ -179,37 +245,89 @@ class ModelData:
         'CNSS' : [],
         }
 
-        # Obtaining all data paths.
-        paths = {
-        'ONE': [os.path.join('data/raw/one', path) for path in os.listdir('data/raw/one')],
-        'CNSS': [os.path.join('data/raw/cnss', path) for path in os.listdir('data/raw/cnss')],
+        # Obtaining all data files.
+        files = {
+        'ONE': [entry for entry in os.scandir('data/raw/one') if entry.is_file()],
+        'CNSS': [entry for entry in os.scandir('data/raw/cnss') if entry.is_file()],
         }
 
-        # Modeling all data from the ONE.
-        for path in paths.get('ONE'):
-            data = self._model_ONE_data(path)
-
-            data_modeled.get('ONE').append(data)
+        # Modeling all data from the ONE in parallel, reusing the files modeled in previous runs.
+        # The stats come from the directory scan, the entries themselves can't be sent to other processes.
+        with ProcessPoolExecutor(max_workers=max(1, min(len(files['ONE']), os.cpu_count()))) as executor:
+            data_modeled['ONE'] = list(executor.map(
+                self._cached_model_ONE,
+                [entry.path for entry in files['ONE']],
+                [entry.stat() for entry in files['ONE']],
+            ))
+
+        # Removing the cached copies of files that changed or were removed, and of older cache versions.
+        cached = {self._cache_path(entry.path, entry.stat()) for entry in files['ONE']}
+        if os.path.isdir(CACHE_DIR):
+            for entry in os.scandir(CACHE_DIR):
+                if entry.is_file() and entry.name.endswith('.parquet') and entry.path not in cached:
+                    os.remove(entry.path)
         
         # Modeling all data from CNSS.
-        data_modeled.get('CNSS').append(self._model_CNSS_data(paths['CNSS']))
+        data_modeled.get('CNSS').append(self._model_CNSS_data([entry.path for entry in files['CNSS']]))
 
         return data_modeled
 
-    def model_and_save_data(self) -> None:
+    @staticmethod
+    def _shrink(data: pd.DataFrame) -> pd.DataFrame:
+        """
+            Downcasts the numeric columns to the smallest dtype that holds their values, the year is
+            stored as int16.
+
+            Parameters:
+            data : pd.DataFrame
+                The modeled data.
+
+            Returns:
+            pd.DataFrame
+                The data with the downcasted columns.
+        """
+        data = data.copy()
+
+        # The ONE columns are object columns holding numbers (or text, when read from CSV).
+        for column in data.select_dtypes('object'):
+            try:
+                data[column] = pd.to_numeric(data[column])
+            except (ValueError, TypeError):
+                continue
+
+        for column in data.select_dtypes('integer'):
+            data[column] = pd.to_numeric(data[column], downcast='integer')
+
+        for column in data.select_dtypes('floating'):
+            data[column] = pd.to_numeric(data[column], downcast='float')
+
+        if 'año' in data.columns:
+            data['año'] = data['año'].astype('int16')
+
+        return data
+
+    def model_and_save_data(self, fmt: str = 'parquet') -> None:
         """
-            Saves modeled data into CSV files organized by institution.
+            Saves modeled data into files organized by institution.
 
             This function retrieves the modeled data from `model_all_data()`, 
             iterates over each institution's data, and saves it in a structured 
             directory under `../data/processed/`. If the directory for an institution 
-            does not exist, it is created. The data is stored as CSV files named 
-            sequentially.
+            does not exist, it is created. The data is stored as Parquet (zstd) or Excel
+            files named sequentially. Saving as Excel removes the Parquet files of previous runs,
+            since the dashboard reads the Parquet file when there's one.
+
+            Parameters:
+                fmt (str): Format of the files, 'parquet' (default) or 'xlsx'.
 
             Raises:
+                ValueError: If the format is not supported.
                 FileNotFoundError: If the base directory '../data/processed' does not exist.
                 OSError: If there is an issue creating directories or writing files.
         """
+        if fmt not in ('parquet', 'xlsx'):
+            raise ValueError("fmt must be 'parquet' or 'xlsx'.")
+
         data_modeled = self._model_all_data()
 
         # Iterating over all the modeled files.
@@ -222,7 +340,19 @@ class ModelData:
             
             # Saving the data in its directory.
             for dataframe in dataframes:
-                dataframe.to_excel(f'data/processed/{institution.lower()}/{institution.lower()} {i}.xlsx')
+                dataframe = self._shrink(dataframe)
+                path = f'data/processed/{institution.lower()}/{institution.lower()} {i}.{fmt}'
+
+                if fmt == 'parquet':
+                    dataframe.to_parquet(path, engine='pyarrow', compression='zstd')
+                else:
+                    dataframe.to_excel(path)
+
+                    # The dashboard prefers the Parquet files, removing the one of a previous run so the
+                    # Excel file is the one read.
+                    parquet_path = os.path.splitext(path)[0] + '.parquet'
+                    if os.path.exists(parquet_path):
+                        os.remove(parquet_path)
                 i += 1
 
 if __name__ == '__main__':
@@ -0,0 +1,86 @@
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# The output of this function is cached by `ModelData`, see `CACHE_VERSION` in `data_cleaning.py`.
+def clean_one_frame(data: pd.DataFrame) -> pd.DataFrame:
+    """
+        Transforms the raw data of a ONE file into a structured DataFrame.
+
+        The function:
+        1. Removes unwanted rows from the beginning and end of the dataset.
+        2. Generates the column names from the non-null values in the first column, propagated to the following rows.
+        3. Ensures column names are unique by appending an index if duplicates exist.
+        4. Builds the output with one row per original column, using the generated names as headers.
+        5. Keeps the fourth quarter of every year and cleans the years.
+
+        Parameters:
+        data : pd.DataFrame
+            The raw data of the file, as read from the first sheet.
+
+        Returns:
+        pd.DataFrame
+            A transformed DataFrame where the original data is transposed, and column names are dynamically generated.
+
+        Raises:
+        ValueError
+            If the row with the years ('años'/'año') is not found.
+    """
+    # Finding the start of our data.
+    is_header = data.iloc[:, 0].astype('string').str.lower().str.strip().isin(('años', 'año')).to_numpy()
+    if not is_header.any():
+        raise ValueError('header row not found.')
+    index_ = int(np.argmax(is_header))
+
+    # Filtering the unwanted rows
+    data = data.iloc[index_:-3]
+    
+    # Factorizing the titles and sub titles, so each name is built from integer codes.
+    title_codes, titles = pd.factorize(data.iloc[:, 0])
+    sub_codes, subtitles = pd.factorize(data.iloc[:, 1], use_na_sentinel=False)
+
+    # The cells that are not null are the titles of the following rows (-1 before the first title).
+    positions = np.maximum.accumulate(np.where(title_codes >= 0, np.arange(title_codes.size), -1))
+    title_codes = np.where(positions >= 0, title_codes[positions], -1)
+
+    # Every pair of title and sub title has a single key, repeated keys are repeated column names.
+    keys = (title_codes.astype(np.int64) + 1) * (len(subtitles) + 1) + sub_codes
+    repeated = pd.Series(keys).duplicated(keep='first').to_numpy()
+
+    # Creating the column names with the title and the sub title.
+    title_names = np.concatenate([[''], titles.astype(str)]).astype(object)
+    sub_names = subtitles.astype(str).to_numpy(dtype=object)
+    names = title_names[title_codes + 1] + ' (' + sub_names[sub_codes] + ')'
+
+    # If column name exist add the row number to differentiate it from the other columns.
+    names[repeated] += ' ' + np.flatnonzero(repeated).astype(str).astype(object)
+
+    # Each original column is a row of the output, its first values are the year and the quarter.
+    values = data.iloc[:, 2:].to_numpy(dtype=object, copy=True)
+
+    # Filling the missing years on a typed string column, before filtering since the year is only
+    # written in the first quarter.
+    values[0] = pd.Series(values[0], dtype='string[pyarrow]').ffill().to_numpy(dtype=object)
+
+    # Keeping the fourth quarters and the rows without quarter.
+    quarters = pd.Series(values[1], dtype='string[pyarrow]').str.strip()
+    keep = (quarters.eq('Cuarto trimestre').fillna(False) | quarters.isna()).to_numpy(dtype=bool)
+
+    # Building the output directly from the kept rows, with the names as headers.
+    data = pd.DataFrame(values[:, keep].T, columns=names, index=pd.RangeIndex(1, values.shape[1] + 1)[keep])
+
+    # Dropping unwanted columns
+    unwanted = {'Años (nan) 1', 'Año (nan) 1'}.intersection(data.columns)
+    if unwanted:
+        data.drop(columns=list(unwanted), inplace=True)
+
+    # Cleaning extra characters with the Arrow string kernels.
+    years = pc.replace_substring(pa.array(data.iloc[:, 0].astype(str).to_numpy()), pattern='*', replacement='')
+    data.iloc[:, 0] = pc.cast(years, pa.float64()).to_numpy(zero_copy_only=False)
+
+    # Standardizing the column names.
+    columns = data.columns.str.lower()
+    data.columns = columns.where(~columns.str.contains('año', regex=False), 'año')
+    
+    return data